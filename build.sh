@@ -47,17 +47,21 @@ echo "  - Creating virtual environment..."
 rm -rf $VENV_DIR
 python3 -m venv $VENV_DIR
 
-# Activate virtual environment and install dependencies
-echo "  - Installing dependencies..."
+# Activate virtual environment and install dependencies into the build directory.
+# The Lambda runs on arm64 (Graviton), so fetch wheels built for that platform
+# and the Lambda Python runtime regardless of the build machine.
+echo "  - Installing dependencies for arm64 Lambda runtime..."
 source $VENV_DIR/bin/activate
 pip install --quiet --upgrade pip
-pip install --quiet -r lambda/requirements.txt
+pip install --quiet \
+    --platform manylinux2014_aarch64 \
+    --implementation cp \
+    --python-version 3.11 \
+    --only-binary=:all: \
+    --target $BUILD_DIR \
+    -r lambda/requirements.txt
 deactivate
 
-# Copy installed packages to build directory
-echo "  - Copying dependencies to build directory..."
-cp -r $VENV_DIR/lib/python*/site-packages/* $BUILD_DIR/
-
 # Copy Lambda code
 echo "  - Copying Lambda code..."
 cp lambda/document_processor.py $BUILD_DIR/
@@ -83,5 +87,5 @@ echo "  Package includes:"
 echo "    - document_processor.py"
 echo "    - schema.json"
 echo "    - prompt.txt"
-echo "    - All Python dependencies (boto3, pypdf)"
+echo "    - All Python dependencies (boto3, pypdf, pybase64, orjson) for arm64"
 echo ""
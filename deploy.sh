@@ -69,6 +69,7 @@ if [ "$CLEAR_DATA" = true ]; then
         
         # Get bucket name from terraform output
         BUCKET_NAME=$(terraform output -raw documents_bucket_name 2>/dev/null || echo "")
+        PROPERTIES_BUCKET_NAME=$(terraform output -raw properties_bucket_name 2>/dev/null || echo "")
         TABLE_NAME=$(terraform output -raw dynamodb_table_name 2>/dev/null || echo "")
         
         cd ..
@@ -103,6 +104,18 @@ if [ "$CLEAR_DATA" = true ]; then
             echo -e "${YELLOW}  S3 bucket not found in terraform state (skipping)${NC}"
         fi
         
+        if [ -n "$PROPERTIES_BUCKET_NAME" ]; then
+            echo -e "${YELLOW}Found properties S3 bucket: $PROPERTIES_BUCKET_NAME${NC}"
+            
+            if aws s3 ls "s3://$PROPERTIES_BUCKET_NAME" 2>/dev/null; then
+                echo -e "${YELLOW}Clearing properties S3 bucket contents...${NC}"
+                aws s3 rm "s3://$PROPERTIES_BUCKET_NAME" --recursive 2>/dev/null || true
+                echo -e "${GREEN}✓ Properties S3 bucket cleared${NC}"
+            else
+                echo -e "${YELLOW}  Properties S3 bucket does not exist yet (skipping)${NC}"
+            fi
+        fi
+        
         if [ -n "$TABLE_NAME" ]; then
             echo -e "${YELLOW}Found DynamoDB table: $TABLE_NAME${NC}"
             
@@ -239,7 +252,6 @@ echo -e "${YELLOW}Generating output-schema.json...${NC}"
 python3 << 'PYTHON_SCRIPT'
 import json
 import sys
-import re
 
 try:
     # Load schema.json
@@ -249,57 +261,44 @@ try:
     properties = schema.get('properties', {})
     required_fields = schema.get('required', [])
     
-    # Parse Lambda code to extract system columns
-    with open('lambda/document_processor.py', 'r') as f:
-        lambda_code = f.read()
+    # System columns written by the Lambda function for every document, in
+    # record order (keep in sync with process_document)
+    system_field_descriptions = {
+        'id': 'Unique identifier for the document record (UUID)',
+        'document_name': 'Name/path of the document in S3',
+        'document_url': 'Full S3 URL of the document (s3://bucket/key format)',
+        'bucket': 'S3 bucket name where the document is stored',
+        'upload_time': 'ISO 8601 timestamp when the document was uploaded to S3',
+        'processing_time': 'ISO 8601 timestamp when the document was processed',
+        'file_hash': 'MD5 (S3 ETag) or SHA256 hash of the document content (for duplicate detection)',
+        'hash_algorithm': 'Algorithm used for file_hash (md5 or sha256)',
+        'file_size': 'Size of the document in bytes',
+        'content_type': 'MIME type of the document (e.g., application/pdf)',
+        'page_count': 'Number of pages in the document (PDF only, optional)'
+    }
     
-    # Find the record creation section
-    record_pattern = r"record = \{([^}]+)\}"
-    match = re.search(record_pattern, lambda_code, re.DOTALL)
+    # Pre-configured indexes for system fields
+    system_indexes = {
+        'id': 'Primary Key',
+        'document_name': 'DocumentNameIndex',
+        'upload_time': 'UploadTimeIndex',
+        'file_hash': 'FileHashIndex'
+    }
     
     system_columns = []
-    if match:
-        record_section = match.group(1)
-        # Extract field assignments
-        field_pattern = r"'([^']+)':\s*([^,\n]+)"
-        fields = re.findall(field_pattern, record_section)
-        
-        # Define descriptions for known system fields
-        system_field_descriptions = {
-            'id': 'Unique identifier for the document record (UUID)',
-            'document_name': 'Name/path of the document in S3',
-            'document_url': 'Full S3 URL of the document (s3://bucket/key format)',
-            'bucket': 'S3 bucket name where the document is stored',
-            'upload_time': 'ISO 8601 timestamp when the document was uploaded to S3',
-            'processing_time': 'ISO 8601 timestamp when the document was processed',
-            'file_hash': 'SHA256 hash of the document content (for duplicate detection)',
-            'file_size': 'Size of the document in bytes',
-            'content_type': 'MIME type of the document (e.g., application/pdf)',
-            'page_count': 'Number of pages in the document (PDF only, optional)'
-        }
-        
-        # Pre-configured indexes for system fields
-        system_indexes = {
-            'id': 'Primary Key',
-            'document_name': 'DocumentNameIndex',
-            'upload_time': 'UploadTimeIndex',
-            'file_hash': 'FileHashIndex'
-        }
+    for field_name, description in system_field_descriptions.items():
+        # Determine type based on field
+        if field_name in ['file_size', 'page_count']:
+            field_type = 'N'
+        else:
+            field_type = 'S'
         
-        for field_name, _ in fields:
-            if field_name in system_field_descriptions:
-                # Determine type based on field
-                if field_name in ['file_size', 'page_count']:
-                    field_type = 'N'
-                else:
-                    field_type = 'S'
-                
-                system_columns.append({
-                    "name": field_name,
-                    "type": field_type,
-                    "description": system_field_descriptions[field_name],
-                    "index": system_indexes.get(field_name, None)
-                })
+        system_columns.append({
+            "name": field_name,
+            "type": field_type,
+            "description": description,
+            "index": system_indexes.get(field_name, None)
+        })
     
     # Add columns from schema.json
     schema_columns = []
@@ -322,10 +321,17 @@ try:
         # Check for always_include property
         always_include = field_def.get('always_include', False)
         
+        # Values whose JSON exceeds 4 KB (LARGE_PROPERTY_THRESHOLD in the Lambda)
+        # are offloaded to the properties bucket and replaced with a pointer map;
+        # only strings, arrays and objects can grow that large
+        description = field_def.get('description', f'Custom field: {field_name}')
+        if json_type in ['string', 'array', 'object']:
+            description += " (values over 4 KB are stored in the properties S3 bucket; the column then holds an M map {\"s3_ref\": \"s3://bucket/<id>/<field>.json\"} instead of this type)"
+        
         column_def = {
             "name": field_name,
             "type": dynamo_type,
-            "description": field_def.get('description', f'Custom field: {field_name}'),
+            "description": description,
             "index": index_name
         }
         
@@ -373,7 +379,7 @@ echo ""
 # Show what will be deployed
 echo -e "${YELLOW}Deployment will include:${NC}"
 echo "  - Lambda function (with schema.json and prompt.txt bundled)"
-echo "  - S3 bucket (documents)"
+echo "  - S3 buckets (documents, large extracted properties)"
 echo "  - DynamoDB table"
 echo "  - SNS/SQS event chain"
 echo "  - IAM roles and policies"
@@ -413,7 +419,7 @@ fi
 
 # Apply deployment
 echo -e "${YELLOW}Deploying infrastructure...${NC}"
-echo "  - Creating S3 bucket for documents"
+echo "  - Creating S3 buckets for documents and large extracted properties"
 echo "  - Deploying Lambda function (with schema.json and prompt.txt)"
 echo "  - Creating DynamoDB table"
 echo "  - Setting up SNS/SQS event chain"
@@ -121,6 +121,12 @@ if terraform output documents_bucket_name &> /dev/null; then
         aws s3 rm s3://$BUCKET_NAME --recursive 2>/dev/null || echo "    (Bucket already empty or doesn't exist)"
         echo -e "${GREEN}✓ S3 bucket emptied${NC}"
     fi
+    PROPERTIES_BUCKET_NAME=$(terraform output -raw properties_bucket_name 2>/dev/null || echo "")
+    if [ ! -z "$PROPERTIES_BUCKET_NAME" ]; then
+        echo "  - Emptying properties bucket: $PROPERTIES_BUCKET_NAME"
+        aws s3 rm s3://$PROPERTIES_BUCKET_NAME --recursive 2>/dev/null || echo "    (Bucket already empty or doesn't exist)"
+        echo -e "${GREEN}✓ S3 bucket emptied${NC}"
+    fi
 else
     echo "  - No buckets to empty"
 fi
@@ -1,49 +1,236 @@
 import json
+import logging
 import os
+import re
 import hashlib
+import time
 import uuid
-import base64
-from datetime import datetime
-from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Tuple
 from urllib.parse import unquote_plus
 from io import BytesIO
 import boto3
-from pypdf import PdfReader
+import orjson
+import pybase64
+from boto3.dynamodb.types import TypeSerializer
+from botocore.config import Config
+from botocore.exceptions import ClientError
 
-# Initialize AWS clients
-s3_client = boto3.client('s3')
-bedrock_runtime = boto3.client('bedrock-runtime')
-dynamodb = boto3.resource('dynamodb')
+# Records propagate to the root logger, which Lambda preconfigures to write to
+# CloudWatch. The level is set on this module's logger only, so DEBUG does not
+# also enable botocore/urllib3 debug output (which logs full request bodies).
+logger = logging.getLogger(__name__)
+logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 
 # Environment variables
 DYNAMODB_TABLE_NAME = os.environ['DYNAMODB_TABLE_NAME']
+PROPERTIES_BUCKET_NAME = os.environ['PROPERTIES_BUCKET_NAME']
 BEDROCK_MODEL_ID = os.environ.get('BEDROCK_MODEL_ID', 'us.anthropic.claude-3-5-sonnet-20241022-v2:0')
 BEDROCK_TEMPERATURE = float(os.environ.get('BEDROCK_TEMPERATURE', '0.0'))
+MAX_CONCURRENT_DOCUMENTS = int(os.environ.get('MAX_CONCURRENT_DOCUMENTS', '10'))
+# 'base64' sends document bytes in the request; 's3' passes an S3 reference to
+# the Converse API so Bedrock reads the object itself (model must support it)
+BEDROCK_DOCUMENT_SOURCE = os.environ.get('BEDROCK_DOCUMENT_SOURCE', 'base64')
 
 # File paths (relative to Lambda function directory)
 SCHEMA_FILE = 'schema.json'
 PROMPT_FILE = 'prompt.txt'
 
-# Get DynamoDB table
-table = dynamodb.Table(DYNAMODB_TABLE_NAME)
+# Markdown code block (optionally tagged as json) wrapping a model response;
+# an unterminated block runs to the end of the response
+JSON_CODE_BLOCK_PATTERN = re.compile(r'```(?:json)?\s*(.*?)\s*(?:```|$)', re.DOTALL)
+
+# Large S3 objects are downloaded as parallel byte-range GETs of this size. It
+# is a multiple of 3 so every part base64-encodes independently of the others.
+S3_PART_SIZE = 9 * 1024 * 1024
+S3_DOWNLOAD_CONCURRENCY = 8
+# Each part is read (and encoded) in chunks of this size as it streams in
+S3_READ_CHUNK_SIZE = 1024 * 1024
+
+# Placeholders marking the per-document fields of the Bedrock request template
+MEDIA_TYPE_PLACEHOLDER = '__MEDIA_TYPE__'
+DOCUMENT_DATA_PLACEHOLDER = '__DOCUMENT_DATA__'
+
+# Content types treated as PDF documents
+PDF_CONTENT_TYPES = frozenset({'application/pdf', 'application/x-pdf'})
+
+# Converse API document formats by content type, used for S3 document sources
+CONVERSE_DOCUMENT_FORMATS = {
+    'application/pdf': 'pdf',
+    'text/csv': 'csv',
+    'application/msword': 'doc',
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document': 'docx',
+    'application/vnd.ms-excel': 'xls',
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet': 'xlsx',
+    'text/html': 'html',
+    'text/plain': 'txt',
+    'text/markdown': 'md'
+}
 
+# Extracted properties whose JSON encoding exceeds this many bytes are stored
+# in the properties bucket, keeping DynamoDB items small (billed per 1 KB)
+LARGE_PROPERTY_THRESHOLD = 4096
+
+# DynamoDB BatchWriteItem accepts at most 25 items per call; items it leaves
+# unprocessed (throttling) are resubmitted with exponential backoff
+DYNAMODB_BATCH_SIZE = 25
+DYNAMODB_MAX_BATCH_ATTEMPTS = 5
+
+# Shared client configuration. The connection pool is sized for every document
+# in an invocation downloading at once (the first part streams on the calling
+# thread alongside S3_DOWNLOAD_CONCURRENCY workers), so warm containers reuse
+# HTTPS connections instead of repeating TLS handshakes.
+client_config = Config(
+    max_pool_connections=max(50, MAX_CONCURRENT_DOCUMENTS * (S3_DOWNLOAD_CONCURRENCY + 1)),
+    tcp_keepalive=True,
+    connect_timeout=3,
+    read_timeout=60,
+    retries={'max_attempts': 3, 'mode': 'standard'}
+)
+
+# Initialize AWS clients
+s3_client = boto3.client('s3', config=client_config)
+bedrock_runtime = boto3.client('bedrock-runtime', config=client_config)
+dynamodb = boto3.client('dynamodb', config=client_config)
 
-def calculate_file_hash(content: bytes) -> str:
+# Converts Python values to DynamoDB attribute values for the low-level client
+serializer = TypeSerializer()
+
+
+def download_document(bucket: str, key: str, encode_base64: bool = False) -> Tuple[BytesIO, Dict[str, Any], Optional[List[bytes]]]:
+    """Download an S3 object, fetching large objects as parallel byte ranges.
+    
+    Returns the object content wrapped in a BytesIO, which is shared by every
+    later processing step, and the metadata of the first GET response. With
+    encode_base64, also returns the base64 encoding of the content as a list of
+    fragments, encoded while the download is still in progress.
+    """
+    try:
+        # The first part doubles as the size probe, so small objects take a single GET
+        response = s3_client.get_object(Bucket=bucket, Key=key, Range=f'bytes=0-{S3_PART_SIZE - 1}')
+    except ClientError as e:
+        # S3 rejects ranged GETs on empty objects
+        if e.response['Error']['Code'] != 'InvalidRange':
+            raise
+        response = s3_client.get_object(Bucket=bucket, Key=key)
+        content = response['Body'].read()
+        return BytesIO(content), response, [pybase64.b64encode(content)] if encode_base64 else None
+    
+    # Fill a pre-sized buffer in place; IfMatch guards against the object
+    # being overwritten while the remaining parts are in flight
+    total_size = int(response['ContentRange'].rsplit('/', 1)[1])
+    content = BytesIO()
+    content.seek(total_size - 1)
+    content.write(b'\0')
+    content.seek(0)
+    view = content.getbuffer()
+    
+    part_starts = range(0, total_size, S3_PART_SIZE)
+    encoded_parts = [[] for _ in part_starts] if encode_base64 else None
+    
+    def read_part(part: Dict[str, Any], index: int, start: int) -> None:
+        end = min(start + S3_PART_SIZE, total_size)
+        offset = encoded_offset = start
+        for chunk in part['Body'].iter_chunks(S3_READ_CHUNK_SIZE):
+            view[offset:offset + len(chunk)] = chunk
+            offset += len(chunk)
+            
+            # Encode every complete 3-byte group received so far
+            if encoded_parts is not None and offset - offset % 3 > encoded_offset:
+                encoded_parts[index].append(pybase64.b64encode(view[encoded_offset:offset - offset % 3]))
+                encoded_offset = offset - offset % 3
+        
+        if offset != end:
+            raise Exception(f"Incomplete read of bytes {start}-{end - 1}: received {offset - start} bytes")
+        
+        # Only the final part can end on a partial 3-byte group
+        if encoded_parts is not None and encoded_offset < end:
+            encoded_parts[index].append(pybase64.b64encode(view[encoded_offset:end]))
+    
+    def fetch_part(index: int, start: int) -> None:
+        part = s3_client.get_object(
+            Bucket=bucket,
+            Key=key,
+            Range=f'bytes={start}-{min(start + S3_PART_SIZE, total_size) - 1}',
+            IfMatch=response['ETag']
+        )
+        read_part(part, index, start)
+    
+    try:
+        if len(part_starts) == 1:
+            read_part(response, 0, 0)
+        else:
+            # Request the remaining parts before consuming the first one
+            with ThreadPoolExecutor(max_workers=S3_DOWNLOAD_CONCURRENCY) as executor:
+                futures = [executor.submit(fetch_part, index, start) for index, start in enumerate(part_starts) if index]
+                read_part(response, 0, 0)
+                for future in futures:
+                    future.result()
+    finally:
+        view.release()
+    
+    document_base64 = [fragment for part in encoded_parts for fragment in part] if encode_base64 else None
+    return content, response, document_base64
+
+
+def calculate_file_hash(document: BytesIO) -> str:
     """Calculate SHA256 hash of file content."""
-    return hashlib.sha256(content).hexdigest()
+    return hashlib.sha256(document.getbuffer()).hexdigest()
+
+
+def get_etag_md5(response: Dict[str, Any]) -> Optional[str]:
+    """Return the S3 ETag if it is the MD5 of the object content.
+    
+    That holds for single-part uploads without KMS or customer-key encryption.
+    """
+    etag = response.get('ETag', '').strip('"')
+    etag_is_md5 = (
+        etag
+        and '-' not in etag
+        and response.get('ServerSideEncryption', 'AES256') == 'AES256'
+        and 'SSECustomerAlgorithm' not in response
+    )
+    return etag if etag_is_md5 else None
+
+
+def get_file_hash(document: Optional[BytesIO], response: Dict[str, Any]) -> Tuple[str, str]:
+    """Return the file hash and the algorithm that produced it.
+    
+    The S3 ETag is reused when it is already the content MD5, so the SHA256
+    pass (and the document content) is only needed otherwise.
+    """
+    etag_md5 = get_etag_md5(response)
+    if etag_md5:
+        return etag_md5, 'md5'
+    return calculate_file_hash(document), 'sha256'
 
 
-def get_page_count(document_content: bytes, content_type: str) -> Optional[int]:
+def get_media_type(content_type: str) -> str:
+    """Strip parameters (such as charset) from a content type and normalize its case."""
+    return content_type.split(';', 1)[0].strip().lower()
+
+
+def is_pdf(content_type: str) -> bool:
+    """Check whether a content type denotes a PDF document."""
+    return get_media_type(content_type) in PDF_CONTENT_TYPES
+
+
+def get_page_count(document: BytesIO, content_type: str) -> Optional[int]:
     """Extract page count from PDF documents."""
     try:
         # Only process PDF documents
-        if 'pdf' in content_type.lower():
-            pdf_file = BytesIO(document_content)
-            pdf_reader = PdfReader(pdf_file)
-            return len(pdf_reader.pages)
+        if is_pdf(content_type):
+            # Imported on first use so non-PDF workloads skip loading pypdf
+            from pypdf import PdfReader
+            
+            pdf_reader = PdfReader(document, strict=False)
+            # Read /Count from the root page tree instead of len(pages), which
+            # walks and flattens every page object in the document
+            return int(pdf_reader.trailer['/Root']['/Pages']['/Count'])
         return None
     except Exception as e:
-        print(f"Warning: Could not extract page count: {str(e)}")
+        logger.warning("Could not extract page count: %s", e)
         return None
 
 
@@ -73,107 +260,187 @@ def load_prompt_template() -> str:
         raise Exception(f"Failed to load prompt from {PROMPT_FILE}: {str(e)}")
 
 
-def invoke_bedrock_with_document(prompt_text: str, document_content: bytes, media_type: str) -> Dict[str, Any]:
-    """Invoke AWS Bedrock with a document using base64 encoding."""
+# Load schema and build the prompt once per Lambda container rather than on
+# every invocation; both files are packaged with the function and never change
+SCHEMA = load_schema()
+PROMPT_TEXT = load_prompt_template().format(schema=orjson.dumps(SCHEMA, option=orjson.OPT_INDENT_2).decode('utf-8'))
+
+
+def build_request_template(prompt_text: str) -> Tuple[bytes, bytes, bytes]:
+    """Pre-serialize the Bedrock request body around its per-document fields.
+    
+    Returns the JSON before the media type, between the media type and the
+    document data, and after the document data.
+    """
+    request_body = {
+        "anthropic_version": "bedrock-2023-05-31",
+        "max_tokens": 4096,
+        "messages": [
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "document",
+                        "source": {
+                            "type": "base64",
+                            "media_type": MEDIA_TYPE_PLACEHOLDER,
+                            "data": DOCUMENT_DATA_PLACEHOLDER
+                        }
+                    },
+                    {
+                        "type": "text",
+                        "text": prompt_text
+                    }
+                ]
+            }
+        ],
+        "temperature": BEDROCK_TEMPERATURE
+    }
+    
+    head, rest = orjson.dumps(request_body).split(orjson.dumps(MEDIA_TYPE_PLACEHOLDER), 1)
+    middle, tail = rest.split(DOCUMENT_DATA_PLACEHOLDER.encode('utf-8'), 1)
+    return head, middle, tail
+
+
+# Serialize the static parts of the Bedrock request once per container
+REQUEST_BODY_TEMPLATE = build_request_template(PROMPT_TEXT)
+
+
+def invoke_bedrock_with_document(document_base64: List[bytes], media_type: str) -> Dict[str, Any]:
+    """Invoke AWS Bedrock with a document using base64 encoding.
+    
+    The document is given as the base64 fragments produced by download_document.
+    """
+    try:
+        # Fill the pre-serialized template. Base64 output never needs JSON
+        # escaping, so the encoded document is spliced in as-is.
+        head, middle, tail = REQUEST_BODY_TEMPLATE
+        body = b''.join((
+            head,
+            orjson.dumps(media_type),
+            middle,
+            *document_base64,
+            tail
+        ))
+        
+        response = bedrock_runtime.invoke_model(
+            modelId=BEDROCK_MODEL_ID,
+            body=body
+        )
+        
+        response_body = orjson.loads(response['body'].read())
+        
+        # Extract the text from Claude's response
+        content = response_body['content'][0]['text']
+        
+        # Parse the JSON response
+        return parse_json_response(content)
+            
+    except Exception as e:
+        raise Exception(f"Failed to invoke Bedrock with document: {str(e)}")
+
+
+def invoke_bedrock_with_s3_document(bucket: str, key: str, media_type: str) -> Dict[str, Any]:
+    """Invoke AWS Bedrock through the Converse API with an S3 document reference."""
     try:
-        # Encode document to base64
-        document_base64 = base64.b64encode(document_content).decode('utf-8')
+        document_format = CONVERSE_DOCUMENT_FORMATS.get(get_media_type(media_type))
+        if document_format is None:
+            raise ValueError(f"Unsupported content type for S3 document source: {media_type}")
         
-        # Prepare the request body with document
-        request_body = {
-            "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": 4096,
-            "messages": [
+        response = bedrock_runtime.converse(
+            modelId=BEDROCK_MODEL_ID,
+            messages=[
                 {
-                    "role": "user",
-                    "content": [
+                    'role': 'user',
+                    'content': [
                         {
-                            "type": "document",
-                            "source": {
-                                "type": "base64",
-                                "media_type": media_type,
-                                "data": document_base64
+                            'document': {
+                                'format': document_format,
+                                # A neutral name, since the model may read it as instructions
+                                'name': 'document',
+                                'source': {
+                                    's3Location': {
+                                        'uri': f's3://{bucket}/{key}'
+                                    }
+                                }
                             }
                         },
                         {
-                            "type": "text",
-                            "text": prompt_text
+                            'text': PROMPT_TEXT
                         }
                     ]
                 }
             ],
-            "temperature": BEDROCK_TEMPERATURE
-        }
-        
-        response = bedrock_runtime.invoke_model(
-            modelId=BEDROCK_MODEL_ID,
-            body=json.dumps(request_body)
+            inferenceConfig={
+                'maxTokens': 4096,
+                'temperature': BEDROCK_TEMPERATURE
+            }
         )
         
-        response_body = json.loads(response['body'].read())
-        
         # Extract the text from Claude's response
-        content = response_body['content'][0]['text']
+        content = response['output']['message']['content'][0]['text']
         
         # Parse the JSON response
         return parse_json_response(content)
             
     except Exception as e:
-        raise Exception(f"Failed to invoke Bedrock with document: {str(e)}")
+        raise Exception(f"Failed to invoke Bedrock with S3 document: {str(e)}")
 
 
 def parse_json_response(content: str) -> Dict[str, Any]:
     """Parse JSON from Claude's response, handling various formats."""
-    try:
-        # If the response contains markdown code blocks, extract JSON
-        if '```json' in content:
-            start = content.find('```json') + 7
-            end = content.find('```', start)
-            content = content[start:end].strip()
-        elif '```' in content:
-            start = content.find('```') + 3
-            end = content.find('```', start)
-            content = content[start:end].strip()
-        
-        return json.loads(content)
-    except json.JSONDecodeError:
-        # If parsing fails, try to parse the entire response
-        return json.loads(content)
+    # If the response contains a markdown code block, extract the JSON inside it
+    match = JSON_CODE_BLOCK_PATTERN.search(content)
+    if match:
+        content = match.group(1)
+    
+    return orjson.loads(content)
 
 
-def process_document(bucket: str, key: str, upload_time: str) -> Dict[str, Any]:
-    """Process a single document."""
-    print(f"Processing document: s3://{bucket}/{key}")
+def process_document(bucket: str, key: str, upload_time: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Process a single document and build its DynamoDB record.
+    
+    Returns the record and its serialized DynamoDB item.
+    """
+    logger.info("Processing document: s3://%s/%s", bucket, key)
     
     # Download document from S3
     try:
-        response = s3_client.get_object(Bucket=bucket, Key=key)
-        document_content = response['Body'].read()
-        content_type = response.get('ContentType', 'application/octet-stream')
-        document_size = len(document_content)
+        if BEDROCK_DOCUMENT_SOURCE == 's3':
+            # Bedrock reads the object itself, so the content is only needed
+            # when the ETag cannot serve as the hash or to count PDF pages
+            response = s3_client.head_object(Bucket=bucket, Key=key)
+            content_type = response.get('ContentType', 'application/octet-stream')
+            document_size = response['ContentLength']
+            document = None
+            if get_etag_md5(response) is None or is_pdf(content_type):
+                document, _, _ = download_document(bucket, key)
+        else:
+            document, response, document_base64 = download_document(bucket, key, encode_base64=True)
+            content_type = response.get('ContentType', 'application/octet-stream')
+            document_size = document.getbuffer().nbytes
     except Exception as e:
         raise Exception(f"Failed to download document from S3: {str(e)}")
     
-    # Calculate file hash
-    file_hash = calculate_file_hash(document_content)
+    # Calculate file hash, reusing the S3 ETag when it is the content MD5
+    file_hash, hash_algorithm = get_file_hash(document, response)
     
     # Extract page count for PDF documents
-    page_count = get_page_count(document_content, content_type)
+    page_count = get_page_count(document, content_type) if document is not None else None
     
-    # Load schema and prompt template
-    schema = load_schema()
-    prompt_template = load_prompt_template()
-    
-    # Build prompt from template
-    prompt_text = prompt_template.format(schema=json.dumps(schema, indent=2))
-    
-    print(f"Processing {content_type} document with base64 encoding")
-    
-    # Invoke Bedrock with document as base64
-    extracted_properties = invoke_bedrock_with_document(prompt_text, document_content, content_type)
+    if BEDROCK_DOCUMENT_SOURCE == 's3':
+        logger.info("Processing %s document from S3 location", content_type)
+        
+        # Invoke Bedrock with a reference to the document in S3
+        extracted_properties = invoke_bedrock_with_s3_document(bucket, key, content_type)
+    else:
+        logger.info("Processing %s document with base64 encoding", content_type)
+        
+        # Invoke Bedrock with document as base64
+        extracted_properties = invoke_bedrock_with_document(document_base64, content_type)
     
     # Generate unique ID
-    record_id = str(uuid.uuid4())
+    record_id = uuid.uuid4().hex
     
     # Prepare record for DynamoDB - flatten extracted properties as top-level columns
     record = {
@@ -182,8 +449,9 @@ def process_document(bucket: str, key: str, upload_time: str) -> Dict[str, Any]:
         'document_url': f's3://{bucket}/{key}',
         'bucket': bucket,
         'upload_time': upload_time,
-        'processing_time': datetime.utcnow().isoformat(),
+        'processing_time': datetime.now(timezone.utc).isoformat(timespec='seconds'),
         'file_hash': file_hash,
+        'hash_algorithm': hash_algorithm,
         'file_size': document_size,
         'content_type': content_type
     }
@@ -192,29 +460,129 @@ def process_document(bucket: str, key: str, upload_time: str) -> Dict[str, Any]:
     if page_count is not None:
         record['page_count'] = page_count
     
-    # Add each extracted property as a top-level column
-    # This allows querying individual properties directly
-    for prop_name, prop_value in extracted_properties.items():
-        record[prop_name] = prop_value
+    try:
+        # Add each extracted property as a top-level column
+        # This allows querying individual properties directly
+        for prop_name, prop_value in extracted_properties.items():
+            serialized_value = orjson.dumps(prop_value)
+            if len(serialized_value) > LARGE_PROPERTY_THRESHOLD:
+                record[prop_name] = store_large_property(record_id, prop_name, serialized_value)
+            else:
+                record[prop_name] = prop_value
+        
+        # Serialize here so a value DynamoDB cannot represent fails only this document
+        item = serialize_record(record)
+    except Exception:
+        delete_large_properties(record)
+        raise
+    
+    return record, item
+
+
+def delete_large_properties(record: Dict[str, Any]) -> None:
+    """Delete the S3 objects of a record's offloaded properties.
     
-    # Store in DynamoDB
+    Used when the record will not be stored, so its pointers would be orphaned.
+    """
+    prefix = f's3://{PROPERTIES_BUCKET_NAME}/'
+    keys = [
+        value['s3_ref'][len(prefix):]
+        for value in record.values()
+        if isinstance(value, dict) and str(value.get('s3_ref', '')).startswith(f"{prefix}{record['id']}/")
+    ]
+    if not keys:
+        return
+    
+    try:
+        s3_client.delete_objects(
+            Bucket=PROPERTIES_BUCKET_NAME,
+            Delete={'Objects': [{'Key': key} for key in keys], 'Quiet': True}
+        )
+    except Exception as e:
+        logger.warning("Could not delete offloaded properties of record %s: %s", record['id'], e)
+
+
+def serialize_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a record to a DynamoDB item for the low-level client."""
     try:
-        table.put_item(Item=record)
-        print(f"Stored record with ID: {record_id}")
+        return {name: serializer.serialize(value) for name, value in record.items()}
     except Exception as e:
-        raise Exception(f"Failed to store record in DynamoDB: {str(e)}")
+        raise Exception(f"Failed to serialize record for DynamoDB: {str(e)}")
+
+
+def store_large_property(record_id: str, prop_name: str, serialized_value: bytes) -> Dict[str, str]:
+    """Store a large extracted property in S3 and return a pointer to it."""
+    key = f'{record_id}/{prop_name}.json'
+    try:
+        s3_client.put_object(
+            Bucket=PROPERTIES_BUCKET_NAME,
+            Key=key,
+            Body=serialized_value,
+            ContentType='application/json'
+        )
+    except Exception as e:
+        raise Exception(f"Failed to store property {prop_name} in S3: {str(e)}")
+    
+    return {'s3_ref': f's3://{PROPERTIES_BUCKET_NAME}/{key}'}
+
+
+def batch_write_items(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Write up to DYNAMODB_BATCH_SIZE items with BatchWriteItem.
+    
+    Returns the items DynamoDB still left unprocessed after every attempt.
+    """
+    request_items = {DYNAMODB_TABLE_NAME: [{'PutRequest': {'Item': item}} for item in items]}
+    
+    for attempt in range(DYNAMODB_MAX_BATCH_ATTEMPTS):
+        if attempt:
+            time.sleep(0.05 * 2 ** attempt)
+        response = dynamodb.batch_write_item(RequestItems=request_items)
+        request_items = response.get('UnprocessedItems')
+        if not request_items:
+            return []
+    
+    return [request['PutRequest']['Item'] for request in request_items[DYNAMODB_TABLE_NAME]]
+
+
+def store_records(items: List[Dict[str, Any]]) -> Dict[str, str]:
+    """Store serialized document items in DynamoDB using batched writes.
+    
+    Returns an error message for each record ID that could not be stored. When
+    a batch is rejected (e.g. one item is invalid or too large), its items are
+    written individually so a bad item only fails its own document.
+    """
+    errors = {}
+    
+    for start in range(0, len(items), DYNAMODB_BATCH_SIZE):
+        chunk = items[start:start + DYNAMODB_BATCH_SIZE]
+        try:
+            pending = batch_write_items(chunk)
+        except Exception as e:
+            logger.warning("Batch write rejected, retrying items individually: %s", e)
+            pending = chunk
+        
+        for item in pending:
+            try:
+                dynamodb.put_item(TableName=DYNAMODB_TABLE_NAME, Item=item)
+            except Exception as e:
+                errors[item['id']['S']] = f"Failed to store record in DynamoDB: {str(e)}"
+        
+        for item in chunk:
+            if item['id']['S'] not in errors:
+                logger.info("Stored record with ID: %s", item['id']['S'])
     
-    return record
+    return errors
 
 
 def lambda_handler(event, context):
     """Lambda handler function triggered by SQS."""
-    print(f"Received event: {json.dumps(event)}")
+    logger.debug("Received event: %s", event)
     
     results = []
     errors = []
+    documents = []
     
-    # Process each SQS record
+    # Collect the documents referenced by each SQS record
     for sqs_record in event['Records']:
         try:
             # Parse SNS message from SQS
@@ -223,36 +591,62 @@ def lambda_handler(event, context):
             # Parse S3 event from SNS
             s3_event = json.loads(sns_message['Message'])
             
-            # Process each S3 record
+            # Collect each S3 record
             for s3_record in s3_event['Records']:
                 bucket = s3_record['s3']['bucket']['name']
                 # URL decode the key to handle special characters
                 key = unquote_plus(s3_record['s3']['object']['key'])
                 upload_time = s3_record['eventTime']
-                
+                documents.append((bucket, key, upload_time))
+                    
+        except Exception as e:
+            logger.error("Failed to parse SQS message: %s", e)
+            errors.append({
+                'status': 'error',
+                'error': str(e)
+            })
+    
+    # Process documents concurrently; each one is dominated by waiting on S3
+    # and Bedrock, so threads overlap those waits
+    processed = []
+    if documents:
+        with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_DOCUMENTS, len(documents))) as executor:
+            futures = {
+                executor.submit(process_document, bucket, key, upload_time): key
+                for bucket, key, upload_time in documents
+            }
+            
+            for future in as_completed(futures):
+                key = futures[future]
                 try:
-                    result = process_document(bucket, key, upload_time)
-                    results.append({
-                        'status': 'success',
-                        'document': key,
-                        'record_id': result['id']
-                    })
+                    processed.append((key, *future.result()))
                 except Exception as e:
-                    error_msg = f"Failed to process {key}: {str(e)}"
-                    print(error_msg)
+                    logger.error("Failed to process %s: %s", key, e)
                     errors.append({
                         'status': 'error',
                         'document': key,
                         'error': str(e)
                     })
-                    
-        except Exception as e:
-            error_msg = f"Failed to parse SQS message: {str(e)}"
-            print(error_msg)
-            errors.append({
-                'status': 'error',
-                'error': str(e)
-            })
+    
+    # Store all records from this invocation in as few DynamoDB calls as possible
+    if processed:
+        storage_errors = store_records([item for _, _, item in processed])
+        for key, record, _ in processed:
+            error = storage_errors.get(record['id'])
+            if error is None:
+                results.append({
+                    'status': 'success',
+                    'document': key,
+                    'record_id': record['id']
+                })
+            else:
+                logger.error("Failed to process %s: %s", key, error)
+                delete_large_properties(record)
+                errors.append({
+                    'status': 'error',
+                    'document': key,
+                    'error': error
+                })
     
     return {
         'statusCode': 200 if not errors else 207,
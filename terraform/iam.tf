@@ -40,6 +40,16 @@ resource "aws_iam_role_policy" "lambda_custom" {
           "${aws_s3_bucket.documents.arn}/*"
         ]
       },
+      {
+        Effect = "Allow"
+        Action = [
+          "s3:PutObject",
+          "s3:DeleteObject"
+        ]
+        Resource = [
+          "${aws_s3_bucket.properties.arn}/*"
+        ]
+      },
       {
         Effect = "Allow"
         Action = [
@@ -53,6 +63,7 @@ resource "aws_iam_role_policy" "lambda_custom" {
         Effect = "Allow"
         Action = [
           "dynamodb:PutItem",
+          "dynamodb:BatchWriteItem",
           "dynamodb:GetItem",
           "dynamodb:UpdateItem",
           "dynamodb:Query",
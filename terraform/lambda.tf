@@ -6,14 +6,19 @@ resource "aws_lambda_function" "document_processor" {
   handler         = "document_processor.lambda_handler"
   source_code_hash = filebase64sha256("${path.module}/../lambda_deployment.zip")
   runtime         = "python3.11"
+  architectures   = ["arm64"] # must match the wheel platform in build.sh
   timeout         = var.lambda_timeout
   memory_size     = var.lambda_memory_size
 
   environment {
     variables = {
-      DYNAMODB_TABLE_NAME  = aws_dynamodb_table.documents.name
-      BEDROCK_MODEL_ID     = var.bedrock_model_id
-      BEDROCK_TEMPERATURE  = var.bedrock_temperature
+      DYNAMODB_TABLE_NAME      = aws_dynamodb_table.documents.name
+      PROPERTIES_BUCKET_NAME   = aws_s3_bucket.properties.id
+      BEDROCK_MODEL_ID         = var.bedrock_model_id
+      BEDROCK_TEMPERATURE      = var.bedrock_temperature
+      MAX_CONCURRENT_DOCUMENTS = var.lambda_max_concurrent_documents
+      BEDROCK_DOCUMENT_SOURCE  = var.bedrock_document_source
+      LOG_LEVEL                = var.lambda_log_level
     }
   }
 
@@ -27,7 +32,7 @@ resource "aws_lambda_function" "document_processor" {
 resource "aws_lambda_event_source_mapping" "document_processing" {
   event_source_arn = aws_sqs_queue.document_processing.arn
   function_name    = aws_lambda_function.document_processor.arn
-  batch_size       = 1
+  batch_size       = var.sqs_batch_size
   enabled          = true
 
   # Optional: Configure scaling behavior
@@ -8,6 +8,11 @@ output "documents_bucket_arn" {
   value       = aws_s3_bucket.documents.arn
 }
 
+output "properties_bucket_name" {
+  description = "Name of the S3 bucket holding large extracted properties"
+  value       = aws_s3_bucket.properties.id
+}
+
 output "dynamodb_table_name" {
   description = "Name of the DynamoDB table"
   value       = aws_dynamodb_table.documents.name
@@ -21,3 +21,27 @@ resource "aws_s3_bucket_public_access_block" "documents" {
   ignore_public_acls      = true
   restrict_public_buckets = true
 }
+
+# S3 bucket for extracted properties too large to store inline in DynamoDB
+resource "aws_s3_bucket" "properties" {
+  bucket = "${var.project_name}-properties-${local.resource_suffix}"
+}
+
+resource "aws_s3_bucket_server_side_encryption_configuration" "properties" {
+  bucket = aws_s3_bucket.properties.id
+
+  rule {
+    apply_server_side_encryption_by_default {
+      sse_algorithm = "AES256"
+    }
+  }
+}
+
+resource "aws_s3_bucket_public_access_block" "properties" {
+  bucket = aws_s3_bucket.properties.id
+
+  block_public_acls       = true
+  block_public_policy     = true
+  ignore_public_acls      = true
+  restrict_public_buckets = true
+}
@@ -28,6 +28,17 @@ variable "bedrock_temperature" {
   default     = 0.0
 }
 
+variable "bedrock_document_source" {
+  description = "How documents are passed to Bedrock: 'base64' (embedded in the request) or 's3' (S3 location via the Converse API)"
+  type        = string
+  default     = "base64"
+
+  validation {
+    condition     = contains(["base64", "s3"], var.bedrock_document_source)
+    error_message = "bedrock_document_source must be either 'base64' or 's3'."
+  }
+}
+
 variable "additional_gsi_attributes" {
   description = "List of additional global secondary indices to create on the DynamoDB table"
   type = list(object({
@@ -51,6 +62,39 @@ variable "lambda_memory_size" {
   default     = 512
 }
 
+variable "lambda_max_concurrent_documents" {
+  description = "Maximum number of documents a single Lambda invocation processes in parallel"
+  type        = number
+  default     = 10
+
+  validation {
+    condition     = var.lambda_max_concurrent_documents >= 1 && floor(var.lambda_max_concurrent_documents) == var.lambda_max_concurrent_documents
+    error_message = "lambda_max_concurrent_documents must be a whole number of at least 1."
+  }
+}
+
+variable "lambda_log_level" {
+  description = "Log level for the Lambda function (DEBUG also logs each received event)"
+  type        = string
+  default     = "INFO"
+
+  validation {
+    condition     = contains(["DEBUG", "INFO", "WARNING", "ERROR"], var.lambda_log_level)
+    error_message = "lambda_log_level must be one of DEBUG, INFO, WARNING or ERROR."
+  }
+}
+
+variable "sqs_batch_size" {
+  description = "Number of SQS messages delivered to each Lambda invocation (1-10)"
+  type        = number
+  default     = 1
+
+  validation {
+    condition     = var.sqs_batch_size >= 1 && var.sqs_batch_size <= 10 && floor(var.sqs_batch_size) == var.sqs_batch_size
+    error_message = "sqs_batch_size must be a whole number between 1 and 10."
+  }
+}
+
 variable "sqs_visibility_timeout" {
   description = "SQS visibility timeout in seconds (should be >= lambda timeout)"
   type        = number